@@ -1,19 +1,56 @@
+import asyncio
+import base64
+import collections
+import copy
+import functools
+import hashlib
+import importlib.util
 import json
-import yaml
-import libnmstate
-import subprocess
+import logging
+import re
+import shutil
+import socket
+import statistics
 import time
 import tempfile
+import threading
 import os
-import shutil
+from dataclasses import asdict, dataclass
+from operator import itemgetter
 from pathlib import Path
-from datetime import datetime
-from libnmstate.schema import Interface
+from types import MappingProxyType
 from mcp.server.fastmcp import FastMCP
-from typing import Literal, Dict, List, Optional
+from typing import Literal, Dict, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import icmplib
+except ImportError:
+    icmplib = None
 
 mcp = FastMCP("Nmstate Network Manager")
 
+logger = logging.getLogger(__name__)
+
+_ERR_EMPTY_STATE = "Error: state_content is empty"
+_ERR_YAML = "Error: Invalid YAML in state_content: "
+_ERR_VALIDATE = "Error validating state_content: "
+_ERR_NOT_MAPPING = "Error: state_content must be a mapping"
+_ERR_APPLY = "Error applying network state: "
+_ERR_APPLY_AND_TEST = "Error applying and validating network state: "
+_ERR_FORMAT = "Error formatting network state: "
+_ERR_ROLLBACK = "Error rolling back network state: "
+_ERR_COMMIT = "Error committing network state: "
+
 def _get_config():
     """Get configuration using ~/.nmstate-mcp as base directory"""
     nmstate_dir = Path.home() / ".nmstate-mcp"
@@ -21,159 +58,861 @@ def _get_config():
         "inventory_file": str(nmstate_dir / "inventory.yaml"),
         "playbook_dir": str(nmstate_dir / "playbooks"),
         "vars_dir": str(nmstate_dir / "vars"),
+        "output_dir": str(nmstate_dir / "output"),
+        "cache_dir": str(nmstate_dir / "cache"),
         "base_dir": str(nmstate_dir)
     }
 
 REMOTE_HOSTS_CONFIG = _get_config()
 
+# Back-to-back show calls within this many seconds reuse one libnmstate snapshot
+_SHOW_TTL = float(os.environ.get("NMSTATE_MCP_SHOW_TTL", "1.0"))
+_SHOW_CACHE: dict[tuple, tuple[float, dict, dict, dict]] = {}
+# Guards _SHOW_CACHE and _SHOW_GENERATION; never held across libnmstate.show()
+# because the event loop takes it to invalidate
+_SHOW_LOCK = threading.Lock()
+# Bumped by every invalidation so a refresh that raced a change is not stored
+_SHOW_GENERATION = 0
+# Taken only by worker threads, so concurrent misses wait for one refresh
+_SHOW_REFRESH_LOCK = threading.Lock()
+
+# NetworkManager checkpoints are global; apply, commit and rollback take turns
+_NM_LOCK = asyncio.Lock()
+
+def _read_nmstate_schema() -> str:
+    """Read the nmstate state schema shipped next to this module"""
+    schema_path = Path(__file__).parent / "schema" / "nmstate.schema.yaml"
+    with open(schema_path, "rb") as schema_file:
+        return schema_file.read().decode()
+
+_NMSTATE_SCHEMA = _read_nmstate_schema()
+
+@functools.cache
+def _state_schema() -> dict:
+    """Parse the nmstate state schema into the form used for validation"""
+    schema = _load_yaml(_NMSTATE_SCHEMA)
+
+    def type_enum(node: dict) -> list:
+        """The interface types a per-type branch of the schema describes"""
+        while "$ref" in node:
+            ref, node = node["$ref"], schema
+            for part in ref[2:].split("/"):
+                node = node[part]
+        enum = node.get("properties", {}).get("type", {}).get("enum")
+        if enum:
+            return enum
+        return [t for sub in node.get("allOf", []) for t in type_enum(sub)]
+
+    for rule in schema["properties"]["interfaces"]["items"]["allOf"]:
+        if "oneOf" in rule:
+            # An interface without a type matches several of the per-type
+            # branches, which nmstate accepts, so only require that one of
+            # them matches
+            branches = rule["anyOf"] = rule.pop("oneOf")
+            # The schema only details some interface types; leave the
+            # others (loopback, ipvlan, macsec, hsr, ipsec, ...) to libnmstate
+            known = [t for branch in branches for t in type_enum(branch)]
+            branches.append({"properties": {"type": {"not": {"enum": known}}}})
+    return schema
+
+def _generated_validator(fastjsonschema):
+    """
+    Import the fastjsonschema validator generated for the state schema,
+    writing its source to the cache directory on first use. Python caches
+    the module's bytecode like any other import, so later server starts
+    skip both code generation and compilation.
+
+    The module is named after the canonical JSON of the schema actually
+    compiled, so reformatting the YAML keeps the cached module while any
+    change to the schema or to the rewrite in _state_schema replaces it.
+    """
+    canonical = json.dumps(_state_schema(), sort_keys=True, separators=(",", ":"))
+    key = f"{fastjsonschema.VERSION}\0{canonical}".encode()
+    digest = hashlib.sha256(key).hexdigest()[:16]
+    cache_dir = Path(REMOTE_HOSTS_CONFIG["cache_dir"])
+    module_path = cache_dir / f"nmstate_schema_validator_{digest}.py"
+    if not module_path.exists():
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # A private temporary file per writer: the warm-up thread and the
+        # first tool call can both get here
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as tmp_file:
+                tmp_file.write(fastjsonschema.compile_to_code(_state_schema()))
+            os.replace(tmp_path, module_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    spec = importlib.util.spec_from_file_location(module_path.stem, module_path)
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+        return module.validate
+    except Exception:
+        # Drop a broken module so the next start generates it again
+        module_path.unlink(missing_ok=True)
+        raise
+
+@functools.cache
+def _state_validator():
+    """
+    Compile the nmstate state schema once into a function returning the
+    first violation (or None). Prefers fastjsonschema, which generates
+    Python code for the schema, over jsonschema.
+    None when neither is installed.
+    """
+    try:
+        import fastjsonschema
+    except ImportError:
+        fastjsonschema = None
+
+    if fastjsonschema is not None:
+        try:
+            try:
+                validate = _generated_validator(fastjsonschema)
+            except OSError:
+                # No writable cache directory; generate in memory instead
+                validate = fastjsonschema.compile(_state_schema())
+        except Exception:
+            logger.warning("fastjsonschema validator unavailable, trying jsonschema",
+                           exc_info=True)
+        else:
+            def check(data) -> str | None:
+                try:
+                    validate(data)
+                except fastjsonschema.JsonSchemaValueException as e:
+                    return e.message
+                return None
+            return check
+
+    try:
+        import jsonschema
+    except ImportError:
+        return None
+    validator = jsonschema.Draft4Validator(_state_schema())
+
+    def check(data) -> str | None:
+        error = jsonschema.exceptions.best_match(validator.iter_errors(data))
+        if error is None:
+            return None
+        location = "/".join(map(str, error.absolute_path))
+        return f"{location}: {error.message}" if location else error.message
+    return check
+
+def _schema_error(data) -> str | None:
+    """Return why data does not match the nmstate state schema, if it does not"""
+    validator = _state_validator()
+    return None if validator is None else validator(data)
+
+def _validate_state(state_content: str) -> tuple[object, str | None]:
+    """
+    Parse state_content and check it against the nmstate state schema.
+    Returns the parsed state and None, or None and the error to report;
+    it never raises.
+    """
+    import yaml
+
+    if not state_content or state_content.isspace():
+        return None, _ERR_EMPTY_STATE
+    try:
+        data = _parse_state(state_content)
+        # Checked here too, for when no schema validator is installed
+        if not isinstance(data, dict):
+            return None, _ERR_NOT_MAPPING
+        schema_error = _schema_error(data)
+    except yaml.YAMLError as e:
+        return None, _ERR_YAML + str(e)
+    except Exception as e:
+        # e.g. RecursionError on absurdly nested input, or a broken validator
+        logger.exception("validating state_content failed")
+        return None, _ERR_VALIDATE + str(e)
+    if schema_error is not None:
+        return None, f"Schema error: {schema_error}"
+    return data, None
+
+def _dumps(obj, pretty: bool = False) -> str:
+    """Serialize obj to compact (or indented) JSON, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else None).decode()
+    if pretty:
+        return json.dumps(obj, indent=2, default=asdict)
+    return json.dumps(obj, separators=(",", ":"), default=asdict)
+
+def _serialize_state(net_state: dict, output_format: str, pretty: bool = False) -> str:
+    """Serialize network state as JSON, YAML, or base64-encoded MessagePack"""
+    if output_format == "yaml":
+        return _dump_yaml(net_state)
+    if output_format == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("msgpack output requires the msgpack package")
+        packed = msgpack.packb(net_state, use_bin_type=True)
+        return base64.b64encode(packed).decode("ascii")
+    return _dumps(net_state, pretty)
+
+_OUTPUT_EXTENSIONS = {"json": ".json", "yaml": ".yaml", "msgpack": ".msgpack.b64"}
+
+# Output files kept on disk; writing a new one removes the least recently used
+_OUTPUT_MAX_FILES = 32
+
+def _prune_output_dir(output_dir: str, keep: str):
+    """Remove the least recently written output files beyond _OUTPUT_MAX_FILES"""
+    entries = []
+    with os.scandir(output_dir) as it:
+        for entry in it:
+            if entry.path != keep and entry.is_file():
+                try:
+                    entries.append((entry.stat().st_mtime_ns, entry.path))
+                except FileNotFoundError:
+                    pass
+    entries.sort(reverse=True)
+    for _, old_path in entries[_OUTPUT_MAX_FILES - 1:]:
+        try:
+            os.unlink(old_path)
+        except FileNotFoundError:
+            pass
+
+def _write_output_file(content: str, extension: str) -> dict:
+    """Store content under the output directory and describe the stored file.
+
+    Files are named by the SHA-256 of their content, so an unchanged state is
+    written only once. Only the _OUTPUT_MAX_FILES most recently requested
+    files are kept. Does blocking I/O; call it from a worker thread.
+    """
+    data = content.encode()
+    digest = hashlib.sha256(data).hexdigest()
+    output_dir = REMOTE_HOSTS_CONFIG["output_dir"]
+    path = os.path.join(output_dir, f"{digest}{extension}")
+
+    if os.path.exists(path):
+        # Mark it as recently used so pruning keeps it
+        os.utime(path)
+    else:
+        os.makedirs(output_dir, exist_ok=True)
+        # Write the encoded bytes straight to the descriptor, no buffered writer
+        fd, tmp_path = tempfile.mkstemp(dir=output_dir)
+        try:
+            try:
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(fd, view):]
+            finally:
+                os.close(fd)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        _prune_output_dir(output_dir, path)
+
+    return {"path": path, "size": len(data), "sha256": digest}
+
+def _load_yaml(content: str):
+    """Parse YAML content with the libyaml C loader when available"""
+    if content.lstrip()[:1] == "{":
+        # JSON is valid YAML but parses far faster as JSON
+        try:
+            return orjson.loads(content) if orjson is not None else json.loads(content)
+        except ValueError:
+            pass
+    import yaml
+    return yaml.load(content, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+@functools.lru_cache(maxsize=32)
+def _parse_state_cached(state_content: str):
+    return _load_yaml(state_content)
+
+def _parse_state(state_content: str):
+    """
+    Parse state_content, reusing the result for content seen recently.
+    Agents usually format a state and then apply the same text.
+    """
+    # libnmstate.apply() may modify its input, so never hand out the cached copy
+    return copy.deepcopy(_parse_state_cached(state_content))
+
+def _merge_states(states: list[dict]) -> dict:
+    """
+    Combine several desired states into one. Lists (interfaces, and the
+    config lists under routes or route-rules) are concatenated, and any
+    other value is taken from the last state that sets it.
+    """
+    merged = {}
+    for state in states:
+        for key, value in state.items():
+            current = merged.get(key)
+            if isinstance(current, list) and isinstance(value, list):
+                merged[key] = current + value
+            elif isinstance(current, dict) and isinstance(value, dict):
+                section = dict(current)
+                for sub_key, sub_value in value.items():
+                    if isinstance(section.get(sub_key), list) and isinstance(sub_value, list):
+                        section[sub_key] = section[sub_key] + sub_value
+                    else:
+                        section[sub_key] = sub_value
+                merged[key] = section
+            else:
+                merged[key] = value
+    return merged
+
+@functools.lru_cache(maxsize=64)
+def _format_state(state_content: str, canonical_order: bool) -> str:
+    """Format state_content, remembering the result for repeated requests"""
+    if canonical_order:
+        import libnmstate
+        return libnmstate.PrettyState(_parse_state(state_content)).yaml
+    # dumping only reads the data, so the shared parsed copy is safe here
+    return _dump_yaml(_parse_state_cached(state_content))
+
+def _show_args(kernel_only: bool, running_config: bool) -> dict:
+    """Translate nmstatectl show options into libnmstate.show() arguments"""
+    show_args = {}
+    if kernel_only:
+        show_args["kernel_only"] = True
+    if running_config:
+        show_args["running_config_only"] = True
+    return show_args
+
+def _cached_show(show_args: dict) -> tuple[dict, dict, dict]:
+    """Return libnmstate.show() output, reusing a snapshot younger than _SHOW_TTL.
+
+    Alongside the state, returns an index mapping each interface name to its
+    interface entries (OVS bridges and their internal interfaces can share a
+    name) and a dict for memoizing serialized output of this snapshot. The
+    state and index are shared with the cache and must not be modified.
+
+    Runs in worker threads; concurrent misses wait for a single refresh.
+    """
+    import libnmstate
+    from libnmstate.schema import Interface
+
+    key = tuple(sorted(show_args.items()))
+
+    def fresh():
+        cached = _SHOW_CACHE.get(key)
+        if cached is not None and time.monotonic() - cached[0] < _SHOW_TTL:
+            return cached[1:]
+        return None
+
+    # A fresh hit must not wait behind a refresh of some other snapshot
+    with _SHOW_LOCK:
+        hit = fresh()
+    if hit is not None:
+        return hit
+
+    with _SHOW_REFRESH_LOCK:
+        with _SHOW_LOCK:
+            # Another caller may have refreshed while this one waited
+            hit = fresh()
+            if hit is not None:
+                return hit
+            generation = _SHOW_GENERATION
+
+        net_state = libnmstate.show(**show_args)
+        by_name = {}
+        get_name = itemgetter(Interface.NAME)
+        for iface in net_state.get(Interface.KEY, []):
+            by_name.setdefault(get_name(iface), []).append(iface)
+        entry = (time.monotonic(), net_state, by_name, {})
+
+        with _SHOW_LOCK:
+            # A change applied while show() ran may not be in this snapshot
+            if generation == _SHOW_GENERATION:
+                _SHOW_CACHE[key] = entry
+        return entry[1:]
+
+def _single_iface_state(net_state: dict, by_name: dict, ifname: str) -> dict | None:
+    """Build a view of net_state holding only the entries for ifname.
+
+    The other top-level sections are shared with net_state, not copied, so
+    the cached snapshot is left untouched. Returns None if ifname is unknown.
+    """
+    from libnmstate.schema import Interface
+
+    matches = by_name.get(ifname)
+    if matches is None:
+        return None
+    return {**net_state, Interface.KEY: matches}
+
+def _invalidate_show_cache():
+    """Forget cached network state after the host configuration changed"""
+    global _SHOW_GENERATION
+    with _SHOW_LOCK:
+        _SHOW_GENERATION += 1
+        _SHOW_CACHE.clear()
+
+def _dump_yaml(data) -> str:
+    """Emit data as block-style YAML with the libyaml C dumper when available"""
+    import yaml
+    dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+    return yaml.dump(data, Dumper=dumper, default_flow_style=False, sort_keys=False, width=1000)
+
 def _ensure_directories():
     """Ensure required directories exist"""
     for dir_name in [REMOTE_HOSTS_CONFIG["playbook_dir"], REMOTE_HOSTS_CONFIG["vars_dir"]]:
         os.makedirs(dir_name, exist_ok=True)
 
-def _generate_unique_filename(prefix: str, extension: str = ".yaml") -> str:
-    """Generate a unique filename with timestamp"""
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    return f"{prefix}_{timestamp}{extension}"
+_PING_RE = re.compile(
+    r"(\d+) packets transmitted, (\d+) received.*?([\d.]+)% packet loss"
+    r"(?:.*?=\s*([\d.]+)/([\d.]+)/([\d.]+)/([\d.]+))?",
+    re.S
+)
+
+def _ping_stats(output: str) -> dict | None:
+    """Extract packet counts and round-trip times from ping's summary"""
+    match = _PING_RE.search(output)
+    if match is None:
+        return None
+    tx, rx, loss, *rtt = match.groups()
+    stats = {"tx": int(tx), "rx": int(rx), "loss_pct": float(loss)}
+    if rtt[0] is not None:
+        rtt_min, rtt_avg, rtt_max, rtt_mdev = map(float, rtt)
+        stats.update(rtt_min=rtt_min, rtt_avg=rtt_avg, rtt_max=rtt_max, rtt_mdev=rtt_mdev)
+    return stats
+
+@dataclass(slots=True)
+class ProbeResult:
+    """Outcome of one connectivity or DNS test"""
+    test: str
+    target: str
+    success: bool
+    interface: str | None = None
+    duration: float | None = None
+    details: dict | list | str | None = None
+    error: str | None = None
+    output: str | None = None
+
+# Resolve the external tools once instead of searching PATH on every call
+_ANSIBLE_PLAYBOOK = shutil.which("ansible-playbook")
+_PING = shutil.which("ping") or "ping"
+_FPING = shutil.which("fping")
+_FPING_RE = re.compile(
+    r"^(\S+)\s+: xmt/rcv/%loss = (\d+)/(\d+)/([\d.]+)%"
+    r"(?:, min/avg/max = ([\d.]+)/([\d.]+)/([\d.]+))?",
+    re.M
+)
+
+# Cleared the first time the kernel refuses an unprivileged ICMP socket
+# (net.ipv4.ping_group_range), after which pings go through ping(8)
+_ICMP_SOCKETS = icmplib is not None
+
+def _icmp_stats(host) -> dict:
+    """Express an icmplib Host in the same terms as _ping_stats()"""
+    stats = {
+        "tx": host.packets_sent,
+        "rx": host.packets_received,
+        "loss_pct": round(host.packet_loss * 100, 1)
+    }
+    if host.rtts:
+        stats.update(
+            rtt_min=host.min_rtt,
+            rtt_avg=host.avg_rtt,
+            rtt_max=host.max_rtt,
+            rtt_mdev=round(statistics.pstdev(host.rtts), 3)
+        )
+    return stats
 
-def _run_connectivity_test(
-        target: str,
+async def _supervise(proc, cmd: list[str], awaitable, timeout: float):
+    """
+    Await awaitable, which reads from proc, for at most timeout seconds.
+    Whatever stops the wait (timeout, cancellation or an error) kills and
+    reaps proc if it is still running, so no child outlives its caller.
+    """
+    try:
+        return await asyncio.wait_for(awaitable, timeout=timeout)
+    except TimeoutError:
+        raise TimeoutError(f"{cmd[0]} timed out after {timeout} seconds")
+    finally:
+        if proc.returncode is None:
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+            await proc.wait()
+
+async def _exec(
+        cmd: list[str],
+        timeout: float,
+        stdin: bytes | None = None
+) -> tuple[int, str, str]:
+    """
+    Run cmd without blocking the event loop, feeding it stdin if given;
+    kill it after timeout seconds
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.PIPE if stdin is not None else None,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await _supervise(proc, cmd, proc.communicate(stdin), timeout)
+    return proc.returncode, stdout.decode(), stderr.decode()
+
+# fping's defaults: probes per target, and seconds between any two probes
+# (10 ms in fping 4+, 25 ms before) and between probes to one target
+_FPING_COUNT = 5
+_FPING_INTERVAL = 0.025
+_FPING_PERIOD = 1.0
+
+async def _run_fping(
+        targets: list[str],
         interface: str | None = None,
         timeout: int = 10
-) -> dict:
-
-  """
-  Run connectivity test to a target
-  """
-
-  try:
-      cmd = ["ping", "-c", "5", "-W", str(timeout)]
-      if interface:
-          cmd.extend(["-I", interface])
-      cmd.append(target)
-
-      start_time = time.time()
-      result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout + 5)
-      duration = time.time() - start_time
-
-      success = result.returncode == 0
-
-      return {
-          "test": "connectivity",
-          "target": target,
-          "interface": interface,
-          "success": success,
-          "duration": round(duration, 2),
-          "details": result.stdout if success else result.stderr
-      }
-  except Exception as e:
-      return {
-          "test": "connectivity",
-          "target": target,
-          "interface": interface,
-          "success": False,
-          "error": str(e)
-      }
-
-def _run_dns_test(
+) -> list[ProbeResult]:
+    """
+    Ping all targets from a single fping process
+    """
+    loop = asyncio.get_running_loop()
+    cmd = [_FPING, "-q", "-c", str(_FPING_COUNT), "-t", str(timeout * 1000)]
+    if interface:
+        cmd.extend(["-I", interface])
+
+    # fping spaces every probe by its interval and each target's probes by
+    # its period, so a large batch takes longer than any single target
+    send_time = max(len(targets) * _FPING_COUNT * _FPING_INTERVAL,
+                    (_FPING_COUNT - 1) * _FPING_PERIOD)
+    limit = send_time + timeout + 10
+
+    start_time = loop.time()
+    # Targets go in on stdin so none of them can be taken for an option
+    _, _, output = await _exec(cmd, limit, stdin="\n".join(targets).encode())
+    duration = round(loop.time() - start_time, 2)
+
+    # fping reports per-host statistics (and lookup errors) on stderr
+    stats = {}
+    for match in _FPING_RE.finditer(output):
+        target, tx, rx, loss, *rtt = match.groups()
+        stats[target] = {"tx": int(tx), "rx": int(rx), "loss_pct": float(loss)}
+        if rtt[0] is not None:
+            rtt_min, rtt_avg, rtt_max = map(float, rtt)
+            stats[target].update(rtt_min=rtt_min, rtt_avg=rtt_avg, rtt_max=rtt_max)
+    errors = {}
+    for line in output.splitlines():
+        target, sep, message = line.partition(": ")
+        target = target.rstrip()
+        if sep and target not in stats:
+            errors[target] = message
+
+    results = []
+    for target in targets:
+        details = stats.get(target)
+        results.append(ProbeResult(
+            test="connectivity",
+            target=target,
+            interface=interface,
+            success=details is not None and details["rx"] > 0,
+            duration=duration,
+            details=details,
+            error=None if details is not None else errors.get(target, "no result from fping")
+        ))
+    return results
+
+async def _exec_tail(
+        cmd: list[str],
+        timeout: float,
+        max_lines: int = 1000,
+        max_bytes: int = 1024 * 1024,
+        max_line_bytes: int = 256 * 1024
+) -> tuple[int, str]:
+    """
+    Run cmd like _exec(), but keep only the tail of its combined stdout and
+    stderr instead of buffering all of it: at most max_lines lines and
+    max_bytes bytes, where a line longer than max_line_bytes keeps only
+    its end
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT
+    )
+    tail = collections.deque()
+    retained = 0
+
+    def keep(line: bytes):
+        nonlocal retained
+        tail.append(line)
+        retained += len(line)
+        while len(tail) > max_lines or retained > max_bytes:
+            retained -= len(tail.popleft())
+
+    async def drain() -> int:
+        # Read fixed-size chunks rather than lines: ansible -v prints each
+        # task result, e.g. a whole network state, on one line
+        partial = bytearray()
+        while chunk := await proc.stdout.read(64 * 1024):
+            start = 0
+            while (end := chunk.find(b"\n", start)) != -1:
+                partial += chunk[start:end + 1]
+                keep(bytes(partial[-max_line_bytes:]))
+                partial.clear()
+                start = end + 1
+            partial += chunk[start:]
+            if len(partial) > max_line_bytes:
+                del partial[:-max_line_bytes]
+        if partial:
+            keep(bytes(partial))
+        return await proc.wait()
+
+    returncode = await _supervise(proc, cmd, drain(), timeout)
+    return returncode, b"".join(tail).decode(errors="replace")
+
+async def _run_connectivity_test(
+        target: str,
+        interface: str | None = None,
+        timeout: int = 10,
+        verbose: bool = False
+) -> ProbeResult:
+    """
+    Run connectivity test to a target
+    """
+    global _ICMP_SOCKETS
+    loop = asyncio.get_running_loop()
+    try:
+        # icmplib cannot bind to an interface and has no raw output to return
+        if _ICMP_SOCKETS and interface is None and not verbose:
+            start_time = loop.time()
+            try:
+                host = await icmplib.async_ping(
+                    target, count=5, interval=0.2, timeout=timeout, privileged=False
+                )
+            except icmplib.SocketPermissionError:
+                _ICMP_SOCKETS = False
+            else:
+                return ProbeResult(
+                    test="connectivity",
+                    target=target,
+                    interface=interface,
+                    success=host.is_alive,
+                    duration=round(loop.time() - start_time, 2),
+                    details=_icmp_stats(host)
+                )
+
+        # -n skips a reverse DNS lookup per reply, -q prints only the summary
+        cmd = [_PING, "-n", "-q", "-c", "5", "-W", str(timeout)]
+        if interface:
+            cmd.extend(["-I", interface])
+        cmd.append(target)
+
+        start_time = loop.time()
+        returncode, output, stderr = await _exec(cmd, timeout + 5)
+        duration = loop.time() - start_time
+
+        success = returncode == 0
+        stats = _ping_stats(output)
+
+        return ProbeResult(
+            test="connectivity",
+            target=target,
+            interface=interface,
+            success=success,
+            duration=round(duration, 2),
+            details=stats if stats is not None else stderr.strip(),
+            output=output if verbose else None
+        )
+    except Exception as e:
+        return ProbeResult(
+            test="connectivity",
+            target=target,
+            interface=interface,
+            success=False,
+            error=str(e)
+        )
+
+async def _run_dns_test(
         domain: str,
         timeout: int = 10
-) -> dict:
+) -> ProbeResult:
     """Run DNS resolution test"""
-
+    loop = asyncio.get_running_loop()
     try:
-        start_time = time.time()
-        result = subprocess.run(
-            ["nslookup", domain],
-            capture_output=True,
-            text=True,
-            timeout=timeout
+        start_time = loop.time()
+        try:
+            addrinfo = await asyncio.wait_for(
+                loop.getaddrinfo(domain, None, type=socket.SOCK_STREAM),
+                timeout=timeout
+            )
+        except TimeoutError:
+            raise TimeoutError(f"DNS lookup timed out after {timeout} seconds")
+        duration = loop.time() - start_time
+
+        addresses = list(dict.fromkeys(info[4][0] for info in addrinfo))
+
+        return ProbeResult(
+            test="dns_resolution",
+            target=domain,
+            success=bool(addresses),
+            duration=round(duration, 2),
+            details=addresses
+        )
+    except Exception as e:
+        return ProbeResult(
+            test="dns_resolution",
+            target=domain,
+            success=False,
+            error=str(e)
         )
-        duration = time.time() - start_time
 
-        success = result.returncode == 0 and "server can't find" not in result.stdout.lower()
+# Ansible reaches these names locally only while the inventory does not define them
+_IMPLICIT_LOCALHOST = frozenset({"localhost", "127.0.0.1", "::1"})
 
-        return {
-            "test": "dns_resolution",
-            "domain": domain,
-            "success": success,
-            "duration": round(duration, 2),
-            "details": result.stdout if success else result.stderr
-        }
-    except Exception as e:
-        return {
-            "test": "dns_resolution",
-            "domain": domain,
-            "success": False,
-            "error": str(e)
-        }
+@functools.lru_cache(maxsize=8)
+def _read_inventory_file(path: str, mtime_ns: int, size: int) -> str:
+    """Read an inventory file; the stat fields only key the cache"""
+    with open(path, 'r') as f:
+        return f.read()
 
-def _get_playbook(action: str) -> str:
-    """Create Ansible playbook for nmstatectl operations"""
+def _read_inventory(path: str) -> str:
+    """
+    Read an inventory file, reusing the previous read while the file's
+    modification time and size are unchanged
+    """
+    st = os.stat(path)
+    return _read_inventory_file(path, st.st_mtime_ns, st.st_size)
+
+@functools.lru_cache(maxsize=8)
+def _parse_inventory(inventory_content: str):
+    """Parse inventory text once per content; callers must not modify the result"""
+    return _load_yaml(inventory_content)
+
+@functools.lru_cache(maxsize=8)
+def _local_inventory_hosts(inventory_content: str) -> frozenset[str]:
+    """
+    Names that Ansible would reach on this machine with a YAML inventory:
+    hosts whose every definition resolves ansible_connection to local (set
+    on the host or on an enclosing group), plus the implicit localhost
+    names the inventory leaves undefined
+    """
+    import yaml
 
-    playbooks = {
-        "show": [
-            {
-                "name": "Show network state",
-                "hosts": "all",
-                "become": "yes",
-                "tasks": [
-                    {
-                        "name": "Install nmstatectl",
-                        "ansible.builtin.dnf": {
-                            "name": "nmstate",
-                            "state": "present"
-                        }
-                    },
-                    {
-                        "name": "Run nmstatectl show",
-                        "ansible.builtin.command": "nmstatectl show --json",
-                        "register": "nmstate_output"
-                    },
-                    {
-                        "name": "Display network state",
-                        "ansible.builtin.debug": {
-                            "var": "nmstate_output.stdout"
-                        }
+    try:
+        inventory = _parse_inventory(inventory_content)
+    except yaml.YAMLError:
+        return frozenset()
+    if inventory is not None and not isinstance(inventory, dict):
+        # Not a YAML inventory (e.g. INI, which may well define localhost);
+        # claim nothing and let Ansible resolve the hosts
+        return frozenset()
+
+    # Host name -> ansible_connection of each of its definitions
+    connections: dict[str, set] = {}
+
+    def walk(group, inherited: dict):
+        if not isinstance(group, dict):
+            return
+        group_vars = {**inherited, **(group.get("vars") or {})}
+        for name, host_vars in (group.get("hosts") or {}).items():
+            host_vars = host_vars if isinstance(host_vars, dict) else {}
+            connection = {**group_vars, **host_vars}.get("ansible_connection")
+            connections.setdefault(name, set()).add(connection)
+        for child in (group.get("children") or {}).values():
+            walk(child, group_vars)
+
+    if inventory is not None:
+        all_group = inventory.get("all")
+        all_vars = (all_group.get("vars") or {}) if isinstance(all_group, dict) else {}
+        for name, group in inventory.items():
+            # Every top-level group is a child of all and inherits its vars
+            walk(group, {} if name == "all" else all_vars)
+
+    local_hosts = {name for name, seen in connections.items() if seen == {"local"}}
+    return frozenset(local_hosts | (_IMPLICIT_LOCALHOST - connections.keys()))
+
+# Playbook content never changes while the server runs; write each one once
+_WRITTEN_PLAYBOOKS: set[str] = set()
+
+def _freeze(obj):
+    """Recursively turn dicts into read-only mappings and lists into tuples"""
+    if isinstance(obj, dict):
+        return MappingProxyType({key: _freeze(value) for key, value in obj.items()})
+    if isinstance(obj, list):
+        return tuple(_freeze(value) for value in obj)
+    return obj
+
+def _thaw(obj):
+    """Build plain dicts and lists from a _freeze()d structure"""
+    if isinstance(obj, MappingProxyType):
+        return {key: _thaw(value) for key, value in obj.items()}
+    if isinstance(obj, tuple):
+        return [_thaw(value) for value in obj]
+    return obj
+
+# Static playbook bodies, built once and frozen all the way down since
+# every run shares them
+_PLAYBOOK_TEMPLATES = _freeze({
+    "show": [
+        {
+            "name": "Show network state",
+            "hosts": "all",
+            "become": "yes",
+            "tasks": [
+                {
+                    "name": "Install nmstatectl",
+                    "ansible.builtin.dnf": {
+                        "name": "nmstate",
+                        "state": "present"
                     }
-                ]
-            }
-        ],
-        "apply": [
-            {
-                "name": "Apply network state using linux-system-roles.network",
-                "hosts": "all",
-                "become": "true",
-                "vars": {
-                    "network_state": "{{ nmstate_config }}"
                 },
-                "tasks": [
-                    {
-                        "name": "Apply network configuration using network role",
-                        "ansible.builtin.include_role": {
-                            "name": "linux-system-roles.network"
-                        }
+                {
+                    "name": "Run nmstatectl show",
+                    "ansible.builtin.command": "nmstatectl show --json",
+                    "register": "nmstate_output"
+                },
+                {
+                    "name": "Display network state",
+                    "ansible.builtin.debug": {
+                        "var": "nmstate_output.stdout"
                     }
-                ]
-            }
-        ]
-    }
-
-    playbook = playbooks.get(action)
-    playbook_content = yaml.dump(playbook, default_flow_style=False)
-
-    _ensure_directories()
+                }
+            ]
+        }
+    ],
+    "apply": [
+        {
+            "name": "Apply network state using linux-system-roles.network",
+            "hosts": "all",
+            "become": "true",
+            "vars": {
+                "network_state": "{{ nmstate_config }}"
+            },
+            "tasks": [
+                {
+                    "name": "Apply network configuration using network role",
+                    "ansible.builtin.include_role": {
+                        "name": "linux-system-roles.network"
+                    }
+                }
+            ]
+        }
+    ]
+})
 
+def _get_playbook(action: str) -> str:
+    """Create Ansible playbook for nmstatectl operations"""
     playbook_filename = f"playbook_{action}.yaml"
     playbook_path = os.path.join(REMOTE_HOSTS_CONFIG["playbook_dir"], playbook_filename)
+    if action in _WRITTEN_PLAYBOOKS and os.path.exists(playbook_path):
+        return playbook_path
+
+    playbook_content = _dump_yaml(_thaw(_PLAYBOOK_TEMPLATES[action]))
+
+    _ensure_directories()
 
     with open(playbook_path, 'w') as playbook_file:
         playbook_file.write(playbook_content)
+    _WRITTEN_PLAYBOOKS.add(action)
 
     return playbook_path
 
-def _run_ansible_playbook(playbook_path: str, host: str | None = None, extra_vars: Optional[Dict] = None) -> Dict:
-    """Run Ansible playbook with given variables"""
+async def _run_ansible_playbook(playbook_path: str, hosts: list[str] | None = None, extra_vars: Optional[Dict] = None) -> Dict:
+    """Run Ansible playbook with given variables, against all hosts in one run"""
+    if _ANSIBLE_PLAYBOOK is None:
+        return {
+            "success": False,
+            "error": "ansible-playbook not found in PATH; install ansible-core"
+        }
+    # Without --limit the playbook would run on every host in the inventory
+    if hosts is not None and (not hosts or any(not host or host.isspace() for host in hosts)):
+        return {
+            "success": False,
+            "error": "target_host must name at least one host"
+        }
 
     if extra_vars is None:
         extra_vars = {}
@@ -181,42 +920,32 @@ def _run_ansible_playbook(playbook_path: str, host: str | None = None, extra_var
     _ensure_directories()
 
     vars_file_path = None
-    if extra_vars:
-        unique_vars_filename = _generate_unique_filename("vars")
-        vars_file_path = os.path.join(REMOTE_HOSTS_CONFIG["vars_dir"], unique_vars_filename)
-
-        with open(vars_file_path, 'w') as vars_file:
-            yaml.dump(extra_vars, vars_file)
-
     try:
+        if extra_vars:
+            # JSON is valid YAML for --extra-vars @file and far cheaper to write
+            with tempfile.NamedTemporaryFile(
+                'w', prefix="vars_", suffix=".json",
+                dir=REMOTE_HOSTS_CONFIG["vars_dir"], delete=False
+            ) as vars_file:
+                vars_file_path = vars_file.name
+                vars_file.write(_dumps(extra_vars))
+
         cmd = [
-            "ansible-playbook",
+            _ANSIBLE_PLAYBOOK,
             "-i", REMOTE_HOSTS_CONFIG['inventory_file'],
             playbook_path,
-            "-v"
+            "-v",
+            *(("--limit", ",".join(hosts)) if hosts else ()),
+            *(("--extra-vars", f"@{vars_file_path}") if vars_file_path else ())
         ]
 
-        if host:
-            cmd.extend(["--limit", f"{host}"])
-        if vars_file_path:
-            cmd.extend(["--extra-vars", f"@{vars_file_path}"])
-
-        print(cmd)
-
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=300
-        )
-
-        print(result.stdout)
+        logger.debug("running %s", cmd)
+        returncode, output = await _exec_tail(cmd, 300)
 
         return {
-            "success": result.returncode == 0,
-            "stdout": result.stdout,
-            "stderr": result.stderr,
-            "returncode": result.returncode
+            "success": returncode == 0,
+            "stdout": output,
+            "returncode": returncode
         }
 
     except Exception as e:
@@ -225,13 +954,39 @@ def _run_ansible_playbook(playbook_path: str, host: str | None = None, extra_var
             "error": str(e)
         }
     finally:
-        pass
+        if vars_file_path is not None and os.path.exists(vars_file_path):
+            os.unlink(vars_file_path)
+
+@dataclass(slots=True)
+class PlaybookSpec:
+    """One ansible-playbook run for _run_playbooks"""
+    action: str
+    hosts: list[str] | None = None
+    extra_vars: dict | None = None
+
+async def _run_playbooks(specs: list[PlaybookSpec]) -> list[Dict]:
+    """
+    Run several playbooks as concurrent ansible-playbook processes, at most
+    one per CPU at a time since each of them forks per host as well
+    """
+    semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+
+    async def run(spec: PlaybookSpec) -> Dict:
+        async with semaphore:
+            return await _run_ansible_playbook(
+                _get_playbook(spec.action), spec.hosts, spec.extra_vars
+            )
+
+    return await asyncio.gather(*(run(spec) for spec in specs))
 
 @mcp.tool()
-def nmstatectl_show(
+async def nmstatectl_show(
     ifname: str | None = None,
     kernel_only: bool = False,
     running_config: bool = False,
+    output_format: Literal["json", "yaml", "msgpack"] = "json",
+    output: Literal["inline", "file"] = "inline",
+    pretty: bool = False,
 ) -> str:
     """
     Show network state using nmstatectl show.
@@ -240,1101 +995,187 @@ def nmstatectl_show(
         ifname: Show specific interface only.
         kernel_only: Show kernel network state only.
         running_config: Show running configuration only.
+        output_format: "json" for readable output, "yaml" for the same state
+            in the nmstate YAML form with far fewer tokens of punctuation,
+            or "msgpack" for compact base64-encoded MessagePack meant for
+            programmatic clients.
+        output: "inline" returns the state itself. "file" writes it under
+            ~/.nmstate-mcp/output and returns only its path, size and sha256,
+            which keeps large states out of the conversation.
+        pretty: Indent JSON output for humans. Compact output is smaller and
+            is what programs and LLMs should read. YAML is always block style.
 
     Returns:
-        The network state as a string (JSON if json_format is True).
+        The network state in the requested output_format, or a JSON
+        description of the written file when output is "file".
     """
     try:
-        # libnmstate.show() returns a dictionary
-        # We need to construct the arguments based on the nmstatectl options
-        show_args = {}
-        if kernel_only:
-            show_args["kernel_only"] = True
-        if running_config:
-            show_args["running_config_only"] = True
+        show_args = _show_args(kernel_only, running_config)
+        net_state, by_name, rendered = await asyncio.to_thread(_cached_show, show_args)
+
+        # Repeat calls for the same snapshot and filter reuse the serialized text
+        text = rendered.get((ifname, output_format, pretty))
+        if text is None:
+            if ifname:
+                net_state = _single_iface_state(net_state, by_name, ifname)
+                if net_state is None:
+                    return f"Error: Interface '{ifname}' not found."
+
+            text = _serialize_state(net_state, output_format, pretty)
+            rendered[(ifname, output_format, pretty)] = text
+
+        if output == "file":
+            file_info = rendered.get((ifname, output_format, pretty, output))
+            if file_info is None:
+                extension = _OUTPUT_EXTENSIONS[output_format]
+                file_info = _dumps(
+                    await asyncio.to_thread(_write_output_file, text, extension)
+                )
+                rendered[(ifname, output_format, pretty, output)] = file_info
+            return file_info
+        return text
 
-        net_state = libnmstate.show(**show_args)
+    except Exception as e:
+        return f"Error showing network state: {e}"
 
-        if ifname:
-            # Filter for a specific interface
-            interfaces = net_state.get(Interface.KEY, [])
-            filtered_interfaces = [
-                iface for iface in interfaces if iface.get(Interface.NAME) == ifname
-            ]
-            if not filtered_interfaces:
-                return f"Error: Interface '{ifname}' not found."
-            net_state[Interface.KEY] = filtered_interfaces
+@mcp.tool()
+async def nmstatectl_show_many(
+    ifnames: list[str],
+    kernel_only: bool = False,
+    running_config: bool = False,
+) -> str:
+    """
+    Show the state of several interfaces at once.
+    Prefer this over calling nmstatectl_show once per interface.
 
-            # If the only thing left is an empty interfaces list, return an error
-            if not net_state.get(Interface.KEY):
-                return f"Error: Could not retrieve state for interface '{ifname}'."
+    Args:
+        ifnames: Names of the interfaces to show.
+        kernel_only: Show kernel network state only.
+        running_config: Show running configuration only.
 
-        return json.dumps(net_state, indent=2)
+    Returns:
+        JSON object mapping each requested name to its list of interface
+        entries, or to null if no interface has that name.
+    """
+    try:
+        show_args = _show_args(kernel_only, running_config)
+        _, by_name, _ = await asyncio.to_thread(_cached_show, show_args)
+        return _dumps({name: by_name.get(name) for name in ifnames})
 
     except Exception as e:
         return f"Error showing network state: {e}"
 
+@mcp.resource(
+    "nmstate://schema",
+    name="nmstate state schema",
+    description="JSON schema (in YAML) for the state_content of the apply tools",
+    mime_type="application/yaml"
+)
+def nmstate_schema() -> str:
+    return _NMSTATE_SCHEMA
+
 @mcp.tool()
-def nmstatectl_apply(
+async def nmstatectl_apply(
     state_content: str,
     commit: bool = True,
-    rollback_timeout: int = 180
+    rollback_timeout: int = 180,
+    verify_change: bool = True
 ) -> str:
     """
-    Here is the json schema for state_content
-    ---
-    $schema: http://json-schema.org/draft-04/schema#
-    type: object
-    properties:
-      capabilities:
-        type: array
-        items:
-          type: string
-      interfaces:
-        type: array
-        items:
-          type: object
-          required:
-            - name
-          allOf:
-            - $ref: "#/definitions/interface-base/rw"
-            - $ref: "#/definitions/interface-base/ro"
-            - $ref: "#/definitions/interface-ip/rw"
-            - $ref: "#/definitions/interface-ethtool/rw"
-            - $ref: "#/definitions/lldp/rw"
-            - $ref: "#/definitions/lldp/ro"
-            - $ref: "#/definitions/802.1x/rw"
-            - oneOf:
-                - "$ref": "#/definitions/interface-unknown/rw"
-                - "$ref": "#/definitions/interface-ethernet/rw"
-                - "$ref": "#/definitions/interface-bond/rw"
-                - "$ref": "#/definitions/interface-linux-bridge/all"
-                - "$ref": "#/definitions/interface-ovs-bridge/all"
-                - "$ref": "#/definitions/interface-ovs-interface/rw"
-                - "$ref": "#/definitions/interface-dummy/rw"
-                - "$ref": "#/definitions/interface-vlan/rw"
-                - "$ref": "#/definitions/interface-vxlan/rw"
-                - "$ref": "#/definitions/interface-team/rw"
-                - "$ref": "#/definitions/interface-vrf/rw"
-                - "$ref": "#/definitions/interface-infiniband/rw"
-                - "$ref": "#/definitions/interface-mac-vlan/rw"
-                - "$ref": "#/definitions/interface-mac-vtap/rw"
-                - "$ref": "#/definitions/interface-veth/rw"
-                - "$ref": "#/definitions/interface-other/rw"
-      routes:
-        type: object
-        properties:
-          config:
-            type: array
-            items:
-              $ref: "#/definitions/route"
-          running:
-            type: array
-            items:
-              $ref: "#/definitions/route"
-      route-rules:
-        type: object
-        properties:
-          config:
-            type: array
-            items:
-              $ref: "#/definitions/route-rule"
-      dns-resolver:
-        type: object
-        properties:
-          config:
-            items:
-              $ref: "#/definitions/dns"
-          running:
-            items:
-              $ref: "#/definitions/dns"
-      ovs-db:
-        type: object
-        properties:
-          external_ids:
-            type: object
-          other_config:
-            type: object
-
-    definitions:
-      types:
-        status:
-          type: string
-          enum:
-            - up
-            - down
-        mac-address:
-          type: string
-          pattern: "^([a-fA-F0-9]{2}:){3,31}[a-fA-F0-9]{2}$"
-        bridge-vlan-tag:
-          type: integer
-          minimum: 0
-          maximum: 4095
-
-      # Interface types
-      interface-base:
-        all:
-          allOf:
-            - $ref: "#/definitions/interface-base/rw"
-            - $ref: "#/definitions/interface-base/ro"
-        rw:
-          properties:
-            description:
-              type: string
-            name:
-              type: string
-            state:
-              type: string
-              enum:
-                - absent
-                - up
-                - down
-                - ignore
-            mac-address:
-              $ref: "#/definitions/types/mac-address"
-            mtu:
-              type: integer
-              minimum: 0
-            accept-all-mac-addresses:
-              type: boolean
-        ro:
-          properties:
-            if-index:
-              type: integer
-              minimum: 0
-            admin-status:
-              $ref: "#/definitions/types/status"
-            link-status:
-              $ref: "#/definitions/types/status"
-            phys-address:
-              $ref: "#/definitions/types/mac-address"
-            higher-layer-if:
-              type: string
-            lower-layer-if:
-              type: string
-            statistics:
-              properties:
-                in-broadcast-pkts:
-                  type: integer
-                  minimum: 0
-                in-discards:
-                  type: integer
-                  minimum: 0
-                in-errors:
-                  type: integer
-                  minimum: 0
-                in-multicast-pkts:
-                  type: integer
-                  minimum: 0
-                in-octets:
-                  type: integer
-                  minimum: 0
-                in-unicast-pkts:
-                  type: integer
-                  minimum: 0
-                out-broadcast-pkts:
-                  type: integer
-                  minimum: 0
-                out-discards:
-                  type: integer
-                  minimum: 0
-                out-errors:
-                  type: integer
-                  minimum: 0
-                out-multicast-pkts:
-                  type: integer
-                  minimum: 0
-                out-octets:
-                  type: integer
-                  minimum: 0
-                out-unicast-pkts:
-                  type: integer
-                  minimum: 0
-      interface-unknown:
-        rw:
-          properties:
-            type:
-              type: string
-              enum:
-                - unknown
-      interface-ethernet:
-        rw:
-          properties:
-            type:
-              type: string
-              enum:
-                - ethernet
-            ethernet:
-              type: object
-              properties:
-                auto-negotiation:
-                  type: boolean
-                duplex:
-                  type: string
-                  enum:
-                    - full
-                    - half
-                speed:
-                  type: integer
-                  minimum: 0
-                flow-control:
-                  type: boolean
-                sr-iov:
-                  type: object
-                  properties:
-                    total-vfs:
-                      type: integer
-                      minimum: 0
-                    vfs:
-                      type: array
-                      items:
-                        type: object
-                        properties:
-                          id:
-                            type: integer
-                            minimum: 0
-                          mac-address:
-                            $ref: "#/definitions/types/mac-address"
-                          spoof-check:
-                            type: boolean
-                          trust:
-                            type: boolean
-                          min-tx-rate:
-                            type: integer
-                            minimum: 0
-                          max-tx-rate:
-                            type: integer
-                            minimum: 0
-                        required:
-                          - id
-      interface-vlan:
-        rw:
-          properties:
-            type:
-              type: string
-              enum:
-                - vlan
-            vlan:
-              type: object
-              properties:
-                id:
-                  type: integer
-                  minimum: 0
-                  maximum: 4095
-                base-iface:
-                  type: string
-              required:
-                - id
-                - base-iface
-      interface-vxlan:
-        rw:
-          properties:
-            type:
-              type: string
-              enum:
-                - vxlan
-            vxlan:
-              type: object
-              properties:
-                id:
-                  type: integer
-                  minimum: 0
-                  maximum: 16777215
-                remote:
-                  type: string
-                destination-port:
-                  type: integer
-                base-iface:
-                  type: string
-
-      interface-bond:
-        rw:
-          properties:
-            type:
-              type: string
-              enum:
-                - bond
-            copy-mac-from:
-              type: string
-            link-aggregation:
-              type: object
-              properties:
-                mode:
-                  type: string
-                port:
-                  type: array
-                  items:
-                    type: string
-                ports:
-                  type: array
-                  items:
-                    type: string
-                options:
-                  type: object
-                ports-config:
-                  type: array
-                  items:
-                    type: string
-      interface-linux-bridge:
-        all:
-          allOf:
-            - $ref: "#/definitions/interface-linux-bridge/rw"
-            - $ref: "#/definitions/interface-linux-bridge/ro"
-        ro:
-          properties:
-            copy-mac-from:
-              type: string
-            bridge:
-              type: object
-              properties:
-                options:
-                  type: object
-                  properties:
-                    gc-timer:
-                      type: integer
-                    hello-timer:
-                      type: integer
-        rw:
-          properties:
-            type:
-              type: string
-              enum:
-                - linux-bridge
-            bridge:
-              type: object
-              properties:
-                ports:
-                  type: array
-                  items:
-                    type: object
-                    properties:
-                      name:
-                        type: string
-                      stp-priority:
-                        type: integer
-                      stp-path-cost:
-                        type: integer
-                      stp-hairpin-mode:
-                        type: boolean
-                      vlan:
-                        type: object
-                        properties:
-                          mode:
-                            type: string
-                            enum:
-                              - trunk
-                              - access
-                          trunk-tags:
-                            type: array
-                            items:
-                              $ref: "#/definitions/bridge-port-vlan"
-                          tag:
-                            $ref: "#/definitions/types/bridge-vlan-tag"
-                          enable-native:
-                            type: boolean
-                port:
-                  type: array
-                  items:
-                    type: object
-                    properties:
-                      name:
-                        type: string
-                      stp-priority:
-                        type: integer
-                      stp-path-cost:
-                        type: integer
-                      stp-hairpin-mode:
-                        type: boolean
-                      vlan:
-                        type: object
-                        properties:
-                          mode:
-                            type: string
-                            enum:
-                              - trunk
-                              - access
-                          trunk-tags:
-                            type: array
-                            items:
-                              $ref: "#/definitions/bridge-port-vlan"
-                          tag:
-                            $ref: "#/definitions/types/bridge-vlan-tag"
-                          enable-native:
-                            type: boolean
-                options:
-                  type: object
-                  properties:
-                    mac-ageing-time:
-                      type: integer
-                    group-forward-mask:
-                      type: integer
-                    group-addr:
-                      $ref: "#/definitions/types/mac-address"
-                    hash-max:
-                      type: integer
-                    multicast-snooping:
-                      type: boolean
-                    multicast-router:
-                      type: integer
-                    multicast-last-member-count:
-                      type: integer
-                    multicast-last-member-interval:
-                      type: integer
-                    multicast-membership-interval:
-                      type: integer
-                    multicast-querier:
-                      type: boolean
-                    multicast-querier-interval:
-                      type: integer
-                    multicast-query-use-ifaddr:
-                      type: boolean
-                    multicast-query-interval:
-                      type: integer
-                    multicast-query-response-interval:
-                      type: integer
-                    multicast-startup-query-count:
-                      type: integer
-                    multicast-startup-query-interval:
-                      type: integer
-                    stp:
-                      type: object
-                      properties:
-                        enabled:
-                          type: boolean
-                        priority:
-                          type: integer
-                        forward-delay:
-                          type: integer
-                        hello-time:
-                          type: integer
-                        max-age:
-                          type: integer
-      interface-ovs-bridge:
-        all:
-          allOf:
-            - $ref: "#/definitions/interface-ovs-bridge/rw"
-            - $ref: "#/definitions/interface-ovs-bridge/ro"
-        rw:
-          properties:
-            type:
-              type: string
-              enum:
-                - ovs-bridge
-            ovs-db:
-              type: object
-            bridge:
-              type: object
-              properties:
-                ports:
-                  type: array
-                  items:
-                    type: object
-                    properties:
-                      name:
-                        type: string
-                      vlan:
-                        type: object
-                        properties:
-                          mode:
-                            type: string
-                            enum:
-                              - trunk
-                              - access
-                          trunk-tags:
-                            type: array
-                            items:
-                              $ref: "#/definitions/bridge-port-vlan"
-                          tag:
-                            $ref: "#/definitions/types/bridge-vlan-tag"
-                          enable-native:
-                            type: boolean
-                      link-aggregation:
-                        type: object
-                        properties:
-                          mode:
-                            type: string
-                          slaves:
-                            type: array
-                            items:
-                              type: object
-                              properties:
-                                name:
-                                  type: string
-                          ports:
-                            type: array
-                            items:
-                              type: object
-                              properties:
-                                name:
-                                  type: string
-                          port:
-                            type: array
-                            items:
-                              type: object
-                              properties:
-                                name:
-                                  type: string
-                port:
-                  type: array
-                  items:
-                    type: object
-                    properties:
-                      name:
-                        type: string
-                      vlan:
-                        type: object
-                        properties:
-                          mode:
-                            type: string
-                            enum:
-                              - trunk
-                              - access
-                          trunk-tags:
-                            type: array
-                            items:
-                              $ref: "#/definitions/bridge-port-vlan"
-                          tag:
-                            $ref: "#/definitions/types/bridge-vlan-tag"
-                          enable-native:
-                            type: boolean
-                      link-aggregation:
-                        type: object
-                        properties:
-                          mode:
-                            type: string
-                          slaves:
-                            type: array
-                            items:
-                              type: object
-                              properties:
-                                name:
-                                  type: string
-                          ports:
-                            type: array
-                            items:
-                              type: object
-                              properties:
-                                name:
-                                  type: string
-                          port:
-                            type: array
-                            items:
-                              type: object
-                              properties:
-                                name:
-                                  type: string
-                options:
-                  type: object
-                  properties:
-                    stp:
-                      type: boolean
-                    rstp:
-                      type: boolean
-                    fail-mode:
-                      type: string
-                    mcast-snooping-enable:
-                      type: boolean
-        ro:
-          properties:
-            bridge:
-              type: object
-              properties:
-                port:
-                  type: array
-                  items:
-                    type: object
-                    properties:
-                      learned-mac-address:
-                        type: array
-                        items:
-                          $ref: "#/definitions/types/mac-address"
-      interface-ovs-interface:
-        rw:
-          properties:
-            type:
-              type: string
-              enum:
-                - ovs-interface
-            ovs-db:
-              type: object
-            patch:
-              type: object
-              properties:
-                peer:
-                  type: string
-      interface-dummy:
-        rw:
-          properties:
-            type:
-              type: string
-              enum:
-                - dummy
-      interface-ip:
-        all:
-          allOf:
-            - $ref: "#/definitions/interface-ip/rw"
-            - $ref: "#/definitions/interface-ip/ro"
-        rw:
-          properties:
-            ipv4:
-              type: object
-              properties:
-                enabled:
-                  type: boolean
-                dhcp:
-                  type: boolean
-                auto-routes:
-                  type: boolean
-                auto-gateway:
-                  type: boolean
-                auto-dns:
-                  type: boolean
-                auto-route-table-id:
-                  type: integer
-                address:
-                  type: array
-                  items:
-                    type: object
-                    properties:
-                      ip:
-                        type: string
-                      prefix-length:
-                        type:
-                          - integer
-                          - string
-                      netmask:
-                        type: string
-                neighbor:
-                  type: array
-                  items:
-                    type: object
-                    properties:
-                      ip:
-                        type: string
-                      link-layer-address:
-                        type: string
-                forwarding:
-                  type: boolean
-            ipv6:
-              type: object
-              properties:
-                enabled:
-                  type: boolean
-                autoconf:
-                  type: boolean
-                dhcp:
-                  type: boolean
-                auto-routes:
-                  type: boolean
-                auto-gateway:
-                  type: boolean
-                auto-dns:
-                  type: boolean
-                auto-route-table-id:
-                  type: integer
-                address:
-                  type: array
-                  items:
-                    type: object
-                    properties:
-                      ip:
-                        type: string
-                      prefix-length:
-                        type:
-                          - integer
-                          - string
-                neighbor:
-                  type: array
-                  items:
-                    type: object
-                    properties:
-                      ip:
-                        type: string
-                      link-layer-address:
-                        type: string
-                forwarding:
-                  type: boolean
-                dup-addr-detect-transmits:
-                  type: integer
-        ro:
-          properties:
-            ipv4:
-              type: object
-              properties:
-                address:
-                  type: array
-                  items:
-                    type: object
-                    properties:
-                      origin:
-                        type: string
-                neighbor:
-                  type: array
-                  items:
-                    type: object
-                    properties:
-                      origin:
-                        type: string
-            ipv6:
-              type: object
-              properties:
-                address:
-                  type: array
-                  items:
-                    type: object
-                    properties:
-                      origin:
-                        type: string
-                      status:
-                        type: string
-                neighbor:
-                  type: array
-                  items:
-                    type: object
-                    properties:
-                      origin:
-                        type: string
-                      is-router:
-                        type: boolean
-                      state:
-                        type: string
-      interface-ethtool:
-        rw:
-          properties:
-            ethtool:
-              type: object
-              properties:
-                pause:
-                  type: object
-                  properties:
-                    autoneg:
-                      type: boolean
-                    rx:
-                      type: boolean
-                    tx:
-                      type: boolean
-                feature:
-                  type: object
-                  additionalProperties:
-                    type: boolean
-                ring:
-                  type: object
-                  properties:
-                    tx:
-                      type: integer
-                      minimum: 0
-                    rx:
-                      type: integer
-                      minimum: 0
-                    rx-jumbo:
-                      type: integer
-                      minimum: 0
-                    rx-mini:
-                      type: integer
-                      minimum: 0
-                coalesce:
-                  type: object
-                  properties:
-                    adaptive-rx:
-                      type: boolean
-                    adaptive-tx:
-                      type: boolean
-                    pkt-rate-high:
-                      type: integer
-                      minimum: 0
-                    pkt-rate-low:
-                      type: integer
-                      minimum: 0
-                    rx-frames:
-                      type: integer
-                      minimum: 0
-                    rx-frames-high:
-                      type: integer
-                      minimum: 0
-                    rx-frames-irq:
-                      type: integer
-                      minimum: 0
-                    rx-frames-low:
-                      type: integer
-                      minimum: 0
-                    rx-usecs:
-                      type: integer
-                      minimum: 0
-                    rx-usecs-high:
-                      type: integer
-                      minimum: 0
-                    rx-usecs-irq:
-                      type: integer
-                      minimum: 0
-                    rx-usecs-low:
-                      type: integer
-                      minimum: 0
-                    sample-interval:
-                      type: integer
-                      minimum: 0
-                    stats-block-usecs:
-                      type: integer
-                      minimum: 0
-                    tx-frames:
-                      type: integer
-                      minimum: 0
-                    tx-frames-high:
-                      type: integer
-                      minimum: 0
-                    tx-frames-irq:
-                      type: integer
-                      minimum: 0
-                    tx-frames-low:
-                      type: integer
-                      minimum: 0
-                    tx-usecs:
-                      type: integer
-                      minimum: 0
-                    tx-usecs-high:
-                      type: integer
-                      minimum: 0
-                    tx-usecs-irq:
-                      type: integer
-                      minimum: 0
-                    tx-usecs-low:
-                      type: integer
-                      minimum: 0
-      interface-team:
-        rw:
-          properties:
-            type:
-              type: string
-              enum:
-                - team
-            team:
-              type: object
-              properties:
-                ports:
-                  type: array
-                  items:
-                    type: object
-                    properties:
-                      name:
-                        type: string
-                runner:
-                  type: object
-                  properties:
-                    name:
-                      type: string
-      interface-vrf:
-        rw:
-          properties:
-            type:
-              type: string
-              enum:
-                - vrf
-            vrf:
-              type: object
-              properties:
-                port:
-                  type: array
-                  items:
-                    type: string
-                ports:
-                  type: array
-                  items:
-                    type: string
-                route-table-id:
-                  type: integer
-      interface-mac-vlan:
-        rw:
-          properties:
-            type:
-              type: string
-              enum:
-                - mac-vlan
-            mac-vlan:
-              type: object
-              properties:
-                base-iface:
-                  type: string
-                mode:
-                  type: string
-                  enum:
-                    - private
-                    - vepa
-                    - bridge
-                    - passthru
-                    - source
-                    - unknown
-                promiscuous:
-                  type: boolean
-      interface-mac-vtap:
-        rw:
-          properties:
-            type:
-              type: string
-              enum:
-                - mac-vtap
-            mac-vtap:
-              type: object
-              properties:
-                base-iface:
-                  type: string
-                mode:
-                  type: string
-                  enum:
-                    - private
-                    - vepa
-                    - bridge
-                    - passthru
-                    - source
-                    - unknown
-                promiscuous:
-                  type: boolean
-      interface-veth:
-        rw:
-          properties:
-            type:
-              type: string
-              enum:
-                - veth
-            veth:
-              type: object
-              properties:
-                peer:
-                  type: string
-              required:
-                - peer
-      interface-other:
-        rw:
-          properties:
-            type:
-              type: string
-              enum:
-                - other
-      route:
-        type: object
-        properties:
-          state:
-            type: string
-            enum:
-              - absent
-          table-id:
-            type: integer
-          metric:
-            type: integer
-          destination:
-            type: string
-          next-hop-interface:
-            type: string
-          next-hop-address:
-            type: string
-      dns:
-        type: object
-        properties:
-          server:
-            type: array
-            items:
-              type: string
-          search:
-            type: array
-            items:
-              type: string
-          options:
-            type: array
-            items:
-              type: string
-      bridge-port-vlan:
-        type: object
-        properties:
-          id:
-            $ref: "#/definitions/types/bridge-vlan-tag"
-          id-range:
-            type: object
-            properties:
-              min:
-                $ref: "#/definitions/types/bridge-vlan-tag"
-              max:
-                $ref: "#/definitions/types/bridge-vlan-tag"
-      route-rule:
-        type: object
-        properties:
-          from:
-            type: string
-          to:
-            type: string
-          priority:
-            type: integer
-          route-table:
-            type: integer
-          state:
-            type: string
-            enum:
-              - absent
-      lldp:
-        ro:
-          properties:
-            neighbors:
-              type: array
-              items:
-                type: object
-        rw:
-          properties:
-            enabled:
-              type: boolean
-      802.1x:
-        rw:
-          properties:
-            identity:
-              type: string
-            eap-methods:
-              type: array
-              items:
-                type: string
-            private-key:
-              type: string
-            private-key-password:
-              type: string
-            client-cert:
-              type: string
-            ca-cert:
-              type: string
-      interface-infiniband:
-        rw:
-          properties:
-            type:
-              type: string
-              enum:
-                - infiniband
-            infiniband:
-              type: object
-              properties:
-                base-iface:
-                  type: string
-                pkey:
-                  type:
-                    - string
-                    - integer
-                mode:
-                  type: string
-                  enum:
-                    - datagram
-                    - connected
+    Apply network state. See resource nmstate://schema for the full
+    property reference of state_content.
 
     instruction: before using the tool, display the YAML desired state to the user.
 
     Args:
         state_content: The network state content (YAML string only).
+        verify_change: Optional. After applying, re-read the system state and
+            fail if it does not match. state_content is always checked
+            against nmstate://schema first; pass False only to skip the
+            slower post-apply check.
 
     Returns:
         Returns success on success.
     """
+    import libnmstate
+    from libnmstate.error import NmstateError
+
+    data, error = _validate_state(state_content)
+    if error is not None:
+        return error
+
     try:
-        data = yaml.safe_load(state_content)
-        libnmstate.apply(data, commit=commit, rollback_timeout=rollback_timeout)
+        # apply blocks on NetworkManager for seconds; keep the event loop free
+        async with _NM_LOCK:
+            await asyncio.to_thread(
+                libnmstate.apply, data, commit=commit, rollback_timeout=rollback_timeout,
+                verify_change=verify_change
+            )
+        _invalidate_show_cache()
         return "success"
 
+    except NmstateError as e:
+        return _ERR_APPLY + str(e)
     except Exception as e:
-        return f"Error applying network state: {e}"
+        logger.exception("nmstatectl_apply failed")
+        return _ERR_APPLY + str(e)
+
+@mcp.tool()
+async def nmstatectl_apply_batch(
+    state_contents: list[str],
+    commit: bool = True,
+    rollback_timeout: int = 60
+) -> str:
+    """
+    Apply several desired states with a single libnmstate transaction.
+    Each state is parsed and checked against nmstate://schema on its own;
+    the valid ones are merged (interface and route lists concatenated) and
+    applied together.
+
+    instruction: before using the tool, display the YAML desired states to the user.
+
+    Args:
+        state_contents: The network state contents (YAML strings only).
+        commit: Optional. Commit the merged change, or leave it to
+            nmstatectl_commit / nmstatectl_rollback.
+        rollback_timeout: Optional. Seconds to wait before automatically
+            rolling back an uncommitted change.
+
+    Returns:
+        JSON list with one entry per state: "success", or the reason the
+        state was rejected or the merged apply failed.
+    """
+    import libnmstate
+    from libnmstate.error import NmstateError
+
+    results: list[str | None] = []
+    valid = []
+    for state_content in state_contents:
+        data, error = _validate_state(state_content)
+        results.append(error)
+        if error is None:
+            valid.append(data)
+
+    if valid:
+        try:
+            async with _NM_LOCK:
+                await asyncio.to_thread(
+                    libnmstate.apply, _merge_states(valid), commit=commit,
+                    rollback_timeout=rollback_timeout
+                )
+            _invalidate_show_cache()
+            outcome = "success"
+        except NmstateError as e:
+            outcome = _ERR_APPLY + str(e)
+        except Exception as e:
+            logger.exception("nmstatectl_apply_batch failed")
+            outcome = _ERR_APPLY + str(e)
+        results = [outcome if result is None else result for result in results]
+
+    return _dumps(results)
 
 @mcp.tool()
-def nmstatectl_apply_and_test_network(
+async def nmstatectl_apply_and_test_network(
     state_content: str,
     rollback_timeout: int = 60
 ) -> str:
@@ -1351,45 +1192,126 @@ def nmstatectl_apply_and_test_network(
     Returns:
         rollback with reason | commit | error
     """
-    try:
-        data = yaml.safe_load(state_content)
-        libnmstate.apply(data, commit=False, rollback_timeout=rollback_timeout)
-
-        # run tests
-        result = _run_connectivity_test(target="1.1.1.1")
-        if result["success"] == False:
-            libnmstate.rollback()
-            error_msg = result.get('details') or result.get('error', 'Unknown error')
-            return f"rollback: test failed: {error_msg}"
-        result = _run_dns_test(domain="google.com")
-        if result["success"] == False:
-            libnmstate.rollback()
-            error_msg = result.get('details') or result.get('error', 'Unknown error')
-            return f"rollback: test failed: {error_msg}"
-
-        libnmstate.commit()
-        return "commit"
+    import libnmstate
+    from libnmstate.error import NmstateError
+
+    data, error = _validate_state(state_content)
+    if error is not None:
+        return error
 
+    try:
+        # Hold the lock until commit or rollback so no other change lands
+        # in the middle of this checkpoint
+        async with _NM_LOCK:
+            # The checkpoint expires rollback_timeout seconds after apply
+            # creates it, so that is the most the tests can take
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + rollback_timeout
+
+            # Commit or roll back this apply's own checkpoint (when libnmstate
+            # returns it) rather than having libnmstate look up the latest one
+            checkpoint = await asyncio.to_thread(
+                libnmstate.apply, data, commit=False, rollback_timeout=rollback_timeout
+            )
+            _invalidate_show_cache()
+
+            # run tests concurrently; the first failure rolls back and
+            # cancels whichever test is still running
+            tests = [
+                asyncio.ensure_future(_run_connectivity_test(target="1.1.1.1")),
+                asyncio.ensure_future(_run_dns_test(domain="google.com"))
+            ]
+            async def rollback(reason: str) -> str:
+                await asyncio.to_thread(libnmstate.rollback, checkpoint=checkpoint)
+                _invalidate_show_cache()
+                return f"rollback: {reason}"
+
+            try:
+                # Leave a second to commit before the checkpoint expires
+                remaining = max(deadline - loop.time() - 1, 0)
+                for test in asyncio.as_completed(tests, timeout=remaining):
+                    result = await test
+                    if not result.success:
+                        error_msg = result.details or result.error or 'Unknown error'
+                        return await rollback(f"test failed: {error_msg}")
+            except TimeoutError:
+                return await rollback(
+                    f"tests did not finish within rollback_timeout ({rollback_timeout}s)"
+                )
+            finally:
+                for test in tests:
+                    test.cancel()
+                await asyncio.gather(*tests, return_exceptions=True)
+
+            await asyncio.to_thread(libnmstate.commit, checkpoint=checkpoint)
+            return "commit"
+
+    except NmstateError as e:
+        return _ERR_APPLY_AND_TEST + str(e)
     except Exception as e:
-        return f"Error applying and validating network state: {e}"
+        logger.exception("nmstatectl_apply_and_test_network failed")
+        return _ERR_APPLY_AND_TEST + str(e)
+
+@mcp.tool()
+async def nmstatectl_apply_full(
+    state_content: str,
+    mode: Literal["commit", "test", "manual"] = "commit",
+    rollback_timeout: int = 60
+) -> str:
+    """
+    Apply network state and settle it in the same call, saving the separate
+    nmstatectl_commit / nmstatectl_rollback round trip.
+
+    instruction: before using the tool, display the YAML desired state to the user.
+
+    Args:
+        state_content: The network state content (YAML string only).
+        mode: "commit" applies and commits. "test" commits only if the
+            connectivity and DNS tests pass and rolls back otherwise; use it
+            only when the user explicitly asks for automatic validation.
+            "manual" applies without committing and leaves the decision to
+            nmstatectl_commit / nmstatectl_rollback.
+        rollback_timeout: Optional. Seconds before an uncommitted change is
+            rolled back automatically ("test" and "manual").
+
+    Returns:
+        success | rollback with reason | commit | error
+    """
+    if mode == "test":
+        return await nmstatectl_apply_and_test_network(state_content, rollback_timeout)
+    return await nmstatectl_apply(
+        state_content, commit=mode == "commit", rollback_timeout=rollback_timeout
+    )
 
 @mcp.tool()
 def nmstatectl_format(
     state_content: str,
+    canonical_order: bool = False,
 ) -> str:
     """
     format state_content into correct yaml and return it.
     Or return error if not possible.
+
+    Args:
+        state_content: The network state content (YAML string only).
+        canonical_order: Reorder keys the way nmstatectl prints them
+            (name, type and state first). Keys otherwise keep the input order.
     """
+    import yaml
+
+    if not state_content or state_content.isspace():
+        return _ERR_EMPTY_STATE
+
     try:
-        data = yaml.safe_load(state_content)
-        formatted_state = libnmstate.PrettyState(data)
-        return formatted_state.yaml
+        return _format_state(state_content, canonical_order)
+    except yaml.YAMLError as e:
+        return _ERR_YAML + str(e)
     except Exception as e:
-        return f"Error formatting network state: {e}"
+        logger.exception("nmstatectl_format failed")
+        return _ERR_FORMAT + str(e)
 
 @mcp.tool()
-def nmstatectl_rollback() -> str:
+async def nmstatectl_rollback() -> str:
     """
     Rollback network state to previous state (commit).
     User after applying a network state with commit=False.
@@ -1398,14 +1320,22 @@ def nmstatectl_rollback() -> str:
     Returns:
         Returns success on success.
     """
+    import libnmstate
+    from libnmstate.error import NmstateError
+
     try:
-        libnmstate.rollback()
+        async with _NM_LOCK:
+            await asyncio.to_thread(libnmstate.rollback)
+        _invalidate_show_cache()
         return "success"
+    except NmstateError as e:
+        return _ERR_ROLLBACK + str(e)
     except Exception as e:
-        return f"Error rolling back network state: {e}"
+        logger.exception("nmstatectl_rollback failed")
+        return _ERR_ROLLBACK + str(e)
 
 @mcp.tool()
-def nmstatectl_commit() -> str:
+async def nmstatectl_commit() -> str:
     """
     Rollback network state to previous state (commit).
     User after applying a network state with commit=False.
@@ -1414,22 +1344,89 @@ def nmstatectl_commit() -> str:
     Returns:
         Returns success on success.
     """
+    import libnmstate
+    from libnmstate.error import NmstateError
+
     try:
-        libnmstate.commit()
+        async with _NM_LOCK:
+            await asyncio.to_thread(libnmstate.commit)
         return "success"
+    except NmstateError as e:
+        return _ERR_COMMIT + str(e)
     except Exception as e:
-        return f"Error commiting back network state"
+        logger.exception("nmstatectl_commit failed")
+        return _ERR_COMMIT + str(e)
+
+@mcp.tool()
+async def connectivity_test_batch(
+    targets: list[str],
+    interface: str | None = None,
+    timeout: int = 10,
+    verbose: bool = False
+) -> str:
+    """
+    Ping several targets concurrently.
+    Addresses are not reverse-resolved, and details hold only the packet
+    counts (tx, rx, loss_pct) and round-trip times in ms (rtt_min, rtt_avg,
+    rtt_max, plus rtt_mdev unless the targets went through fping).
+
+    Args:
+        targets: Hosts or addresses to ping.
+        interface: Optional. Interface to send the pings from.
+        timeout: Optional. Seconds to wait for each reply.
+        verbose: Optional. Also return ping's raw output as "output".
+
+    Returns:
+        JSON list with one connectivity test result per target.
+    """
+    # Without ICMP sockets, one fping run is cheaper than a ping per target
+    use_icmp = _ICMP_SOCKETS and interface is None
+    if _FPING and not verbose and not use_icmp and len(targets) > 1:
+        try:
+            return _dumps(await _run_fping(targets, interface, timeout))
+        except Exception as e:
+            return _dumps([
+                ProbeResult(test="connectivity", target=target, interface=interface,
+                            success=False, error=str(e))
+                for target in targets
+            ])
+    results = await asyncio.gather(
+        *(_run_connectivity_test(target, interface, timeout, verbose) for target in targets)
+    )
+    return _dumps(results)
+
+@mcp.tool()
+async def dns_test_batch(
+    domains: list[str],
+    timeout: int = 10
+) -> str:
+    """
+    Resolve several domain names concurrently with the system resolver.
+
+    Args:
+        domains: Domain names to resolve.
+        timeout: Optional. Seconds to wait for each lookup.
+
+    Returns:
+        JSON list with one DNS resolution result per domain, listing the
+        resolved addresses.
+    """
+    results = await asyncio.gather(
+        *(_run_dns_test(domain, timeout) for domain in domains)
+    )
+    return _dumps(results)
 
 
 @mcp.tool()
-def remote_nmstatectl_show(
-    target_host: str,
+async def remote_nmstatectl_show(
+    target_host: str | list[str],
 ) -> str:
     """
     Show network state on remote hosts using Ansible.
 
     Args:
-        target_host: ansible label for name of host
+        target_host: ansible label for name of host, or a list of them to
+            query in a single ansible-playbook run
 
     Returns:
         Network state from remote hosts
@@ -1439,47 +1436,53 @@ def remote_nmstatectl_show(
             return "Error: No remote hosts configured. Use configure_remote_hosts first."
 
         # Read inventory to get configured hosts
-        with open(REMOTE_HOSTS_CONFIG["inventory_file"], 'r') as f:
-            inventory_content = f.read()
+        inventory_content = _read_inventory(REMOTE_HOSTS_CONFIG["inventory_file"])
+
+        # A host Ansible would only reach locally is this machine: read its
+        # state in-process instead of running nmstatectl through a playbook
+        hosts = [target_host] if isinstance(target_host, str) else target_host
+        local_hosts = _local_inventory_hosts(inventory_content)
+        if hosts and all(host in local_hosts for host in hosts):
+            net_state, _, _ = await asyncio.to_thread(_cached_show, _show_args(False, False))
+            return f"Remote show completed successfully (local host):\n{_dumps(net_state)}"
 
         playbook_path = _get_playbook("show")
 
         # Run playbook
-        result = _run_ansible_playbook(playbook_path, target_host, {})
+        result = await _run_ansible_playbook(playbook_path, hosts, {})
 
         if result["success"]:
             return f"Remote show completed successfully:\n{result['stdout']}"
         else:
-            return f"Error or warning running remote show: {result.get('stdout')}"
+            return f"Error or warning running remote show: {result.get('stdout') or result.get('error')}"
 
     except Exception as e:
         return f"Error showing remote network state: {e}"
 
 @mcp.tool()
-def remote_nmstatectl_apply(
+async def remote_nmstatectl_apply(
     state_content: str,
-    target_host: str
+    target_host: str | list[str]
 ) -> str:
     """
     Apply network state on remote hosts using linux-system-roles.network role.
 
     Args:
         state_content: The network state content (YAML string in nmstate format)
-        target_hosts: host name to target
+        target_host: host name to target, or a list of them to configure in
+            a single ansible-playbook run
 
     Returns:
         Application result from remote hosts
     """
+    state_data, error = _validate_state(state_content)
+    if error is not None:
+        return error
+
     try:
         if not os.path.exists(REMOTE_HOSTS_CONFIG["inventory_file"]):
             return "Error: No remote hosts configured. Use configure_remote_hosts first."
 
-        # Parse the state content to ensure it's valid YAML
-        try:
-            state_data = yaml.safe_load(state_content)
-        except yaml.YAMLError as e:
-            return f"Error: Invalid YAML in state_content: {e}"
-
         # Create apply playbook with state content
         extra_vars = {
             "nmstate_config": state_data
@@ -1488,16 +1491,51 @@ def remote_nmstatectl_apply(
         playbook_content = _get_playbook("apply")
 
         # Run playbook
-        result = _run_ansible_playbook(playbook_content, target_host, extra_vars)
+        hosts = [target_host] if isinstance(target_host, str) else target_host
+        result = await _run_ansible_playbook(playbook_content, hosts, extra_vars)
 
         if result["success"]:
             return f"Remote apply completed successfully:\n{result['stdout']}"
         else:
-            return f"Error or warning running remote apply: {result.get('stdout')}"
+            return f"Error or warning running remote apply: {result.get('stdout') or result.get('error')}"
 
     except Exception as e:
         return f"Error applying remote network state: {e}"
 
+@mcp.tool()
+async def remote_nmstatectl_apply_many(
+    states: dict[str, str]
+) -> str:
+    """
+    Apply a different network state to each remote host, running one
+    ansible-playbook process per host concurrently.
+
+    Args:
+        states: Mapping of host name to the network state content (YAML
+            string in nmstate format) to apply on it
+
+    Returns:
+        JSON object mapping each host to its application result
+    """
+    if not os.path.exists(REMOTE_HOSTS_CONFIG["inventory_file"]):
+        return "Error: No remote hosts configured. Use configure_remote_hosts first."
+
+    results: dict[str, str | None] = {}
+    specs = []
+    for host, state_content in states.items():
+        state_data, results[host] = _validate_state(state_content)
+        if results[host] is not None:
+            continue
+        specs.append(PlaybookSpec("apply", [host], {"nmstate_config": state_data}))
+
+    for spec, result in zip(specs, await _run_playbooks(specs)):
+        if result["success"]:
+            results[spec.hosts[0]] = f"Remote apply completed successfully:\n{result['stdout']}"
+        else:
+            results[spec.hosts[0]] = f"Error or warning running remote apply: {result.get('stdout') or result.get('error')}"
+
+    return _dumps(results)
+
 
 @mcp.tool()
 def show_remote_inventory(
@@ -1512,6 +1550,8 @@ def show_remote_inventory(
     Returns:
         Current inventory configuration
     """
+    import yaml
+
     try:
         # Use provided inventory file or default
         if inventory_file:
@@ -1523,12 +1563,11 @@ def show_remote_inventory(
             return f"No inventory file found at {inv_file}. Please create it first.\n" \
                    f"See the documentation for inventory file guidelines."
 
-        with open(inv_file, 'r') as f:
-            inventory_content = f.read()
+        inventory_content = _read_inventory(inv_file)
 
         # Parse and analyze inventory
         try:
-            inventory_data = yaml.safe_load(inventory_content)
+            inventory_data = _parse_inventory(inventory_content)
 
             return f"   Current inventory file: {inv_file}\n" \
                    f"   Content:\n" \
@@ -1541,9 +1580,24 @@ def show_remote_inventory(
     except Exception as e:
         return f"Error reading inventory: {e}"
 
+def _warm_up():
+    """
+    Load libnmstate, take a first snapshot and build the schema validator
+    so the first tool call does not pay for them
+    """
+    try:
+        _cached_show(_show_args(False, False))
+        _state_validator()
+    except Exception:
+        logger.debug("warm-up failed", exc_info=True)
+
 # This block ensures the server runs when the script is executed
 if __name__ == "__main__":
-    print(f"Starting Nmstate Network Manager MCP server...")
+    # stdout carries the MCP stdio transport; FastMCP logs to stderr
+    logger.info("Starting Nmstate Network Manager MCP server...")
+
+    # Warm up in the background so the server answers the client right away
+    threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
 
     # Pass the host and port to the run method
     mcp.run()
@@ -13,8 +13,13 @@ Source0:        %{name}-%{version}.tar.gz
 # Runtime dependencies
 Requires:       python3 >= 3.12
 Requires:       python3-libnmstate
+Requires:       python3-pyyaml
 Requires:       uv
 Requires:       ansible-core
+Recommends:     python3-orjson
+Recommends:     python3-msgpack
+Recommends:     (python3-fastjsonschema or python3-jsonschema)
+Recommends:     python3-icmplib
 
 %description
 A Model Context Protocol (MCP) server implementation that works with MCP clients
@@ -31,11 +36,15 @@ assistants to manage network configurations through nmstate and ansible.
 # Create directory structure
 mkdir -p %{buildroot}%{_bindir}
 mkdir -p %{buildroot}%{_datadir}/%{name}
+mkdir -p %{buildroot}%{_datadir}/%{name}/schema
 mkdir -p %{buildroot}%{_docdir}/%{name}
 
 # Install main application
 install -m 755 main.py %{buildroot}%{_datadir}/%{name}/main.py
 
+# Install nmstate state schema
+install -m 644 schema/nmstate.schema.yaml %{buildroot}%{_datadir}/%{name}/schema/nmstate.schema.yaml
+
 # Install setup script
 install -m 755 setup_cursor.py %{buildroot}%{_datadir}/%{name}/setup_cursor.py
 
@@ -73,6 +82,7 @@ chmod 755 %{buildroot}%{_bindir}/nmstate-mcp-setup
 %{_bindir}/nmstate-mcp
 %{_bindir}/nmstate-mcp-setup
 %{_datadir}/%{name}/main.py
+%{_datadir}/%{name}/schema/nmstate.schema.yaml
 %{_datadir}/%{name}/setup_cursor.py
 %{_datadir}/%{name}/uv.lock
 %{_datadir}/%{name}/pyproject.toml
@@ -4,6 +4,7 @@ Setup script for nmstate-mcp with Cursor
 Automatically configures the MCP server in Cursor's mcp.json
 """
 
+import functools
 import json
 import os
 import sys
@@ -11,6 +12,14 @@ import subprocess
 import shutil
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Resolved once; every configured path lives under the user's home
+_HOME = Path.home()
+
 def print_step(step_num, total_steps, message):
     """Print a formatted step message"""
     print(f"[{step_num}/{total_steps}] {message}")
@@ -45,15 +54,30 @@ def cleanup_on_failure(created_files, created_dirs):
             shutil.rmtree(dir_path)
             print_info(f"Removed directory: {dir_path}")
 
+@functools.cache
+def find_executables(names=("uv", "ansible")):
+    """Return which of names are executables on PATH, reading each PATH directory once"""
+    wanted = set(names)
+    found = set()
+    for directory in os.environ.get("PATH", "").split(os.pathsep):
+        if found == wanted:
+            break
+        if not directory:
+            continue
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if (entry.name in wanted and entry.name not in found
+                            and not entry.is_dir() and os.access(entry.path, os.X_OK)):
+                        found.add(entry.name)
+        except OSError:
+            continue
+    return frozenset(found)
+
 def check_dependencies():
     """Check for missing dependencies"""
-    missing_deps = []
-
-    if shutil.which("uv") is None:
-        missing_deps.append("uv")
-
-    if shutil.which("ansible") is None:
-        missing_deps.append("ansible")
+    present = find_executables()
+    missing_deps = [dep for dep in ("uv", "ansible") if dep not in present]
 
     if not missing_deps:
         print_success("All dependencies are available")
@@ -73,11 +97,10 @@ def check_dependencies():
 
 def setup_python_environment():
     """Create a python virtual environment for nmstate-mcp"""
-    nmstate_mcp_dir = Path(__file__).parent.absolute()
-    cache_dir = Path.home() / ".cache" / "nmstate-mcp"
+    cache_dir = _HOME / ".cache" / "nmstate-mcp"
     venv_path = cache_dir / ".venv"
 
-    if shutil.which("uv") is None:
+    if "uv" not in find_executables():
         print_info("uv not available, skipping python environment setup")
         return False
 
@@ -123,14 +146,15 @@ def setup_python_environment():
 
 def create_mcp_json():
     """Create or update ~/.cursor/mcp.json"""
-    cursor_dir = Path.home() / ".cursor"
+    cursor_dir = _HOME / ".cursor"
     mcp_json_path = cursor_dir / "mcp.json"
 
     cursor_dir.mkdir(exist_ok=True)
 
     if mcp_json_path.exists():
-        with open(mcp_json_path, 'r') as f:
-            config = json.load(f)
+        with open(mcp_json_path, 'rb') as f:
+            raw = f.read()
+        config = orjson.loads(raw) if orjson is not None else json.loads(raw)
     else:
         config = {"mcpServers": {}}
 
@@ -141,39 +165,40 @@ def create_mcp_json():
         print_info("nmstate-mcp entry already exists in mcp.json, skipping")
         return True, mcp_json_path
 
-    nmstate_mcp_dir = Path(__file__).parent.absolute()
     config["mcpServers"]["nmstate-mcp"] = {
         "command": "nmstate-mcp",
     }
 
-    with open(mcp_json_path, 'w') as f:
-        json.dump(config, f, indent=2)
+    if orjson is not None:
+        content = orjson.dumps(config, option=orjson.OPT_INDENT_2)
+    else:
+        content = json.dumps(config, indent=2).encode()
+    with open(mcp_json_path, 'wb') as f:
+        f.write(content)
 
     return True, mcp_json_path
 
 def create_nmstate_mcp_directory():
     """Create ~/.nmstate-mcp directory structure"""
-    nmstate_dir = Path.home() / ".nmstate-mcp"
+    nmstate_dir = _HOME / ".nmstate-mcp"
 
     try:
-        nmstate_dir.mkdir(exist_ok=True)
-
-        (nmstate_dir / "playbooks").mkdir(exist_ok=True)
-        (nmstate_dir / "vars").mkdir(exist_ok=True)
+        # makedirs creates nmstate_dir itself along with the first subdirectory
+        os.makedirs(nmstate_dir / "playbooks", exist_ok=True)
+        os.makedirs(nmstate_dir / "vars", exist_ok=True)
 
         inventory_file = nmstate_dir / "inventory.yaml"
         if not inventory_file.exists():
-            with open(inventory_file, 'w') as f:
-                f.write(
-                    "# inventory.yaml\n"
-                    "# This file is used to define the inventory for nmstate-mcp.\n"
-                    "# Add your hosts and groups below in YAML format.\n\n"
-                    "# Example structure:\n"
-                    "# all:\n"
-                    "#   hosts:\n"
-                    "#     localhost:\n"
-                    "#       ansible_connection: local\n"
-                )
+            inventory_file.write_text(
+                "# inventory.yaml\n"
+                "# This file is used to define the inventory for nmstate-mcp.\n"
+                "# Add your hosts and groups below in YAML format.\n\n"
+                "# Example structure:\n"
+                "# all:\n"
+                "#   hosts:\n"
+                "#     localhost:\n"
+                "#       ansible_connection: local\n"
+            )
 
         return True, nmstate_dir
 
@@ -0,0 +1,47 @@
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+
+
+class LocalInventoryHostsTest(unittest.TestCase):
+    def test_empty_inventory_keeps_implicit_localhost(self):
+        self.assertEqual(main._local_inventory_hosts(""), main._IMPLICIT_LOCALHOST)
+
+    def test_ini_inventory_claims_no_hosts(self):
+        inventory = "localhost ansible_host=192.0.2.10 ansible_connection=ssh\n"
+        self.assertEqual(main._local_inventory_hosts(inventory), frozenset())
+
+    def test_ini_inventory_with_groups_claims_no_hosts(self):
+        inventory = (
+            "[web]\n"
+            "localhost ansible_host=192.0.2.10 ansible_connection=ssh\n"
+        )
+        self.assertEqual(main._local_inventory_hosts(inventory), frozenset())
+
+    def test_yaml_inventory(self):
+        inventory = (
+            "all:\n"
+            "  hosts:\n"
+            "    box:\n"
+            "      ansible_connection: local\n"
+            "    localhost:\n"
+            "      ansible_host: 192.0.2.10\n"
+            "  children:\n"
+            "    lab:\n"
+            "      vars:\n"
+            "        ansible_connection: local\n"
+            "      hosts:\n"
+            "        vm1:\n"
+        )
+        self.assertEqual(
+            main._local_inventory_hosts(inventory),
+            {"box", "vm1", "127.0.0.1", "::1"}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
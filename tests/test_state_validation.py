@@ -0,0 +1,85 @@
+import asyncio
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+# Import before sys.modules is patched so each test does not reload it
+import yaml  # noqa: E402,F401
+
+
+def _fake_libnmstate(applied: list):
+    """A libnmstate stand-in that records the states it is asked to apply"""
+    libnmstate = types.ModuleType("libnmstate")
+    error = types.ModuleType("libnmstate.error")
+
+    class NmstateError(Exception):
+        pass
+
+    error.NmstateError = NmstateError
+    libnmstate.error = error
+    libnmstate.apply = lambda state, **kwargs: applied.append(state)
+    return {"libnmstate": libnmstate, "libnmstate.error": error}
+
+
+class ApplyInterfaceTypesTest(unittest.TestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        patcher = mock.patch.dict(main.REMOTE_HOSTS_CONFIG, cache_dir=cache_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        main._state_validator.cache_clear()
+        self.addCleanup(main._state_validator.cache_clear)
+
+        self.applied = []
+        patcher = mock.patch.dict(sys.modules, _fake_libnmstate(self.applied))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def apply(self, state_content: str) -> str:
+        return asyncio.run(main.nmstatectl_apply(state_content, verify_change=False))
+
+    def test_loopback(self):
+        result = self.apply(
+            "interfaces:\n"
+            "- name: lo\n"
+            "  type: loopback\n"
+            "  state: up\n"
+            "  mtu: 65536\n"
+        )
+        self.assertEqual(result, "success")
+        self.assertEqual(self.applied[0]["interfaces"][0]["type"], "loopback")
+
+    def test_ipvlan(self):
+        result = self.apply(
+            "interfaces:\n"
+            "- name: ipvlan0\n"
+            "  type: ipvlan\n"
+            "  state: up\n"
+            "  ipvlan:\n"
+            "    base-iface: eth1\n"
+            "    mode: l2\n"
+        )
+        self.assertEqual(result, "success")
+        self.assertEqual(self.applied[0]["interfaces"][0]["type"], "ipvlan")
+
+    def test_known_type_is_still_checked(self):
+        result = self.apply(
+            "interfaces:\n"
+            "- name: eth1\n"
+            "  type: ethernet\n"
+            "  ethernet:\n"
+            "    duplex: sideways\n"
+        )
+        self.assertTrue(result.startswith("Schema error:"), result)
+        self.assertEqual(self.applied, [])
+
+
+if __name__ == "__main__":
+    unittest.main()